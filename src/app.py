@@ -1,12 +1,22 @@
 #!/usr/bin/env python3
 
+import asyncio
+import atexit
+import functools
 import logging
+import re
+import selectors
 import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
-from ipaddress import IPv4Address
 
-from flask import Flask, render_template
-from zeroconf import ServiceBrowser, ServiceListener, Zeroconf
+from flask import Flask, stream_template
+from zeroconf import Error as ZeroconfError
+from zeroconf import IPVersion, ServiceListener
+from zeroconf.asyncio import AsyncServiceBrowser, AsyncServiceInfo, AsyncZeroconf
 
 app = Flask(__name__)
 
@@ -17,7 +27,200 @@ logging.basicConfig(
     datefmt="%Y-%m-%d %H:%M:%S",
 )
 
+# How long discovery results are reused before the network is swept again (seconds)
+CACHE_TTL = 30
+
+# Sort key for devices without a valid IP (255.255.255.255), so they sort last
+IP_SORT_END = 0xFFFFFFFF
+
+# SSDP multicast group
+SSDP_ADDR = "239.255.255.250"
+SSDP_PORT = 1900
+
+# M-SEARCH message to discover SSDP devices, formatted with the search target
+SSDP_REQUEST_TEMPLATE = "\r\n".join(
+    [
+        "M-SEARCH * HTTP/1.1",
+        f"HOST: {SSDP_ADDR}:{SSDP_PORT}",
+        'MAN: "ssdp:discover"',
+        "MX: 2",
+        "ST: %s",
+        "",
+        "",
+    ]
+).encode()
+
+# Multicast TTL for M-SEARCH requests
+SSDP_MULTICAST_TTL = 2
+
+# Receive buffer for the SSDP socket, large enough to hold a burst of responses
+SSDP_RECV_BUFFER = 256 * 1024
+
+# How many M-SEARCH requests to send, and how far apart (seconds)
+SSDP_SEND_COUNT = 3
+SSDP_SEND_INTERVAL = 0.8
+
+# Matches one "Key: value" header line in a raw SSDP response
+SSDP_HEADER_RE = re.compile(rb"^([^:\r\n]+):[ \t]*([^\r\n]*)", re.MULTILINE)
+
+# SSDP headers worth keeping, everything else in a response is dropped
+SSDP_HEADERS = frozenset(
+    (b"location", b"st", b"usn", b"server", b"cache-control", b"nt", b"nts")
+)
 
+# How long to wait for a single mDNS service lookup (milliseconds)
+MDNS_LOOKUP_TIMEOUT = 2000
+
+# Stop mDNS discovery early once no new service has been found for this long (seconds)
+MDNS_QUIET_PERIOD = 1.5
+
+# Common service types to browse
+# fmt: off
+MDNS_SERVICE_TYPES = (
+    "_afpovertcp._tcp.local.",            # AppleTalk Filing Protocol (AFP)
+    "_airdrop._tcp.local.",               # Apple AirDrop
+    "_airplay._tcp.local.",               # Apple AirPlay (Apple TV)
+    "_airport._tcp.local.",               # Apple AirPort
+    "_androidtvremote._tcp.local.",       # Nvidia Shield / Android TV
+    "_axis-video._tcp.local.",            # Axis cameras
+    "_bose._tcp.local.",                  # Bose speakers
+    "_companion-link._tcp.local.",        # Apple TV remote
+    "_cups._sub._ipps._tcp.local.",       # Printers (CUPS)
+    "_daap._tcp.local.",                  # Apple iTunes music sharing
+    "_device-info._tcp.local.",           # Apple device info
+    "_epson-scanner._tcp.local.",         # Epson scanners
+    "_ftp._tcp.local.",                   # FTP
+    "_googlecast._tcp.local.",            # Google Cast (Chromecast)
+    "_googlezone._tcp.local.",            # Google Home
+    "_hap._tcp.local.",                   # Apple HomeKit Accessory Protocol
+    "_homekit._tcp.local.",               # Apple HomeKit
+    "_http._tcp.local.",                  # HTTP
+    "_https._tcp.local.",                 # HTTPS
+    "_hue._tcp.local.",                   # Philips Hue bridge
+    "_ipp._tcp.local.",                   # Printers (Internet Printing Protocol)
+    "_ipps._tcp.local.",                  # Printers (IPP over TLS)
+    "_matter._tcp.local.",                # Matter smart home protocol
+    "_mqtt._tcp.local.",                  # MQTT broker
+    "_nfs._tcp.local.",                   # Network File System
+    "_nut._tcp.local.",                   # Network UPS Tools
+    "_pdl-datastream._tcp.local.",        # Printers (Apple Page Description Language)
+    "_philipshue._tcp.local.",            # Philips Hue lights
+    "_printer._tcp.local.",               # Printers
+    "_raop._tcp.local.",                  # Apple AirPlay audio (AirTunes)
+    "_remote-login._tcp.local.",          # Remote login
+    "_rfb._tcp.local.",                   # VNC (Remote Frame Buffer)
+    "_roku._tcp.local.",                  # Roku streaming devices
+    "_rsp._tcp.local.",                   # Roku streaming player
+    "_scanner._tcp.local.",               # Scanners
+    "_sftp-ssh._tcp.local.",              # SFTP
+    "_shelly._tcp.local.",                # Shelly IoT devices
+    "_sleep-proxy._udp.local.",           # Apple Bonjour sleep proxy
+    "_smb._tcp.local.",                   # SMB/Samba file sharing
+    "_sonos._tcp.local.",                 # Sonos speakers
+    "_spotify-connect._tcp.local.",       # Spotify Connect
+    "_ssh._tcp.local.",                   # SSH
+    "_telnet._tcp.local.",                # Telnet
+    "_webdav._tcp.local.",                # WebDAV
+    "_webdavs._tcp.local.",               # WebDAV
+    "_workstation._tcp.local.",           # Workstation service
+)
+# fmt: on
+
+# Long-lived mDNS listener and its first discovery, started on first use
+_mdns_browser = None
+_mdns_lock = threading.Lock()
+
+# Cached discovery results, keyed by function and arguments
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def ttl_cache(ttl=CACHE_TTL):
+    """
+    Cache the list returned by a discovery function for `ttl` seconds
+
+    Concurrent callers that miss the cache wait for a single refresh instead
+    of each sweeping the network.
+
+    Args:
+        ttl: How long a cached result stays valid (seconds)
+
+    Returns:
+        Decorator wrapping the discovery function
+    """
+
+    def decorator(func):
+        refresh_lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (
+                func.__module__,
+                func.__qualname__,
+                args,
+                tuple(sorted(kwargs.items())),
+            )
+
+            def lookup():
+                with _cache_lock:
+                    entry = _cache.get(key)
+                if entry is not None and time.monotonic() - entry[0] < ttl:
+                    return entry[1]
+                return None
+
+            devices = lookup()
+            if devices is None:
+                with refresh_lock:
+                    # Another thread may have refreshed while we were waiting
+                    devices = lookup()
+                    if devices is None:
+                        devices = func(*args, **kwargs)
+                        with _cache_lock:
+                            _cache[key] = (time.monotonic(), devices)
+
+            # Hand out a copy so callers can sort it without touching the cache
+            return list(devices)
+
+        return wrapper
+
+    return decorator
+
+
+@functools.lru_cache(maxsize=8)
+def build_ssdp_request(search_target):
+    """
+    Build the encoded M-SEARCH message for a search target
+
+    Args:
+        search_target: SSDP search target
+
+    Returns:
+        Bytes of the M-SEARCH message
+    """
+    return SSDP_REQUEST_TEMPLATE % search_target.encode()
+
+
+def parse_ssdp_headers(data):
+    """
+    Parse the headers of a raw SSDP response
+
+    Args:
+        data: Raw bytes of the response datagram
+
+    Returns:
+        Dictionary of lowercase header names to values, limited to SSDP_HEADERS
+    """
+    headers = {}
+    for match in SSDP_HEADER_RE.finditer(data):
+        key = match.group(1).strip().lower()
+        if key in SSDP_HEADERS:
+            headers[key.decode()] = (
+                match.group(2).strip().decode("utf-8", errors="ignore")
+            )
+    return headers
+
+
+@ttl_cache()
 def discover_ssdp_devices(search_target="ssdp:all", timeout=5):
     """
     Discover SSDP devices on the local network
@@ -29,62 +232,80 @@ def discover_ssdp_devices(search_target="ssdp:all", timeout=5):
     Returns:
         List of dictionaries containing device information
     """
-    SSDP_ADDR = "239.255.255.250"
-    SSDP_PORT = 1900
-
-    # M-SEARCH message to discover SSDP devices
-    ssdp_request = "\r\n".join(
-        [
-            "M-SEARCH * HTTP/1.1",
-            f"HOST: {SSDP_ADDR}:{SSDP_PORT}",
-            'MAN: "ssdp:discover"',
-            "MX: 3",
-            f"ST: {search_target}",
-            "",
-            "",
-        ]
-    )
+    ssdp_request = build_ssdp_request(search_target)
 
     devices = []
     seen_locations = set()
 
     # Create UDP socket
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    sock.settimeout(timeout)
-
     try:
-        # Send the M-SEARCH request
-        sock.sendto(ssdp_request.encode(), (SSDP_ADDR, SSDP_PORT))
-        logging.info(f"Sent SSDP discovery request for {search_target}")
-
-        # Collect responses
-        while True:
-            try:
-                data, addr = sock.recvfrom(2048)
-                response = data.decode("utf-8", errors="ignore")
-
-                # Parse the response to extract useful information
-                device_info = {"ip": addr[0]}
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    except OSError as e:
+        logging.error(f"Error during SSDP discovery: {e}")
+        return devices
 
-                for line in response.split("\r\n"):
-                    if ":" in line:
-                        key, value = line.split(":", 1)
-                        device_info[key.strip().lower()] = value.strip()
+    stop_sending = threading.Event()
 
-                # Use location as unique identifier to avoid duplicates
-                location = device_info.get("location", f"{addr[0]}:{addr[1]}")
-                if location not in seen_locations:
-                    seen_locations.add(location)
-                    devices.append(device_info)
-                    logging.info(f"Found device at {addr[0]}")
+    def send_requests():
+        # UDP is easily lost (especially on Wi-Fi), so repeat the M-SEARCH
+        for _ in range(SSDP_SEND_COUNT):
+            try:
+                sock.sendto(ssdp_request, (SSDP_ADDR, SSDP_PORT))
+            except OSError as e:
+                logging.error(f"Error sending SSDP discovery request: {e}")
+                return
+            logging.info(f"Sent SSDP discovery request for {search_target}")
+            if stop_sending.wait(SSDP_SEND_INTERVAL):
+                return
 
-            except socket.timeout:
-                break
+    sender = threading.Thread(target=send_requests, daemon=True)
 
-    except Exception as e:
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Allow one router hop so devices behind a mesh AP or VLAN trunk can answer
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, SSDP_MULTICAST_TTL)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        # Responses arrive in a burst right after each M-SEARCH, don't let the kernel drop them
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SSDP_RECV_BUFFER)
+        sock.bind(("", 0))
+        sock.setblocking(False)
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(sock, selectors.EVENT_READ)
+
+            # Send the M-SEARCH requests while collecting responses
+            sender.start()
+
+            # Collect responses until the deadline, draining each burst in one wakeup
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not selector.select(remaining):
+                    break
+
+                while True:
+                    try:
+                        data, addr = sock.recvfrom(2048)
+                    except BlockingIOError:
+                        break
+
+                    # Parse the response to extract useful information
+                    device_info = {"ip": addr[0]}
+                    device_info.update(parse_ssdp_headers(data))
+
+                    # Use location as unique identifier to avoid duplicates
+                    location = device_info.get("location", f"{addr[0]}:{addr[1]}")
+                    if location not in seen_locations:
+                        seen_locations.add(location)
+                        devices.append(device_info)
+                        logging.info(f"Found device at {addr[0]}")
+
+    except OSError as e:
         logging.error(f"Error during SSDP discovery: {e}")
     finally:
+        stop_sending.set()
+        if sender.is_alive():
+            sender.join()
         sock.close()
 
     return devices
@@ -94,62 +315,232 @@ class MDNSListener(ServiceListener):
     """Listener for mDNS/Zeroconf services"""
 
     def __init__(self):
-        self.devices = []
+        # Each resolved service by name, and the devices built from them keyed by
+        # (server, port), so a host advertising the same endpoint under several
+        # service names only shows up once
+        self.services_by_name = {}
+        self.devices_by_key = {}
+        self.lock = threading.Lock()
+        # Pending lookup per service name, only touched from the event loop
+        self.tasks = {}
+        self.added = asyncio.Event()
+
+    def snapshot(self):
+        """Return a copy of the devices found so far"""
+        with self.lock:
+            return list(self.devices_by_key.values())
+
+    def add_device(self, name, device_info):
+        """Store a resolved service and rebuild the device for its server and port"""
+        key = (device_info["server"], device_info["port"])
+        with self.lock:
+            old_info = self.services_by_name.get(name)
+            self.services_by_name[name] = device_info
+            self.rebuild_device(key)
+            if old_info is not None:
+                old_key = (old_info["server"], old_info["port"])
+                if old_key != key:
+                    self.rebuild_device(old_key)
+
+    def remove_device(self, name):
+        """Forget a service and rebuild the device it belonged to"""
+        with self.lock:
+            old_info = self.services_by_name.pop(name, None)
+            if old_info is not None:
+                self.rebuild_device((old_info["server"], old_info["port"]))
+
+    def rebuild_device(self, key):
+        """Merge the services still present for a (server, port) into one device, caller holds the lock"""
+        services = [
+            info
+            for info in self.services_by_name.values()
+            if (info["server"], info["port"]) == key
+        ]
+        if not services:
+            self.devices_by_key.pop(key, None)
+            return
+
+        # The first service found names the device, the others add to it
+        device = dict(services[0])
+        device["addresses"] = list(device["addresses"])
+        if "properties" in device:
+            device["properties"] = dict(device["properties"])
+        for info in services[1:]:
+            for addr_str in info["addresses"]:
+                if addr_str not in device["addresses"]:
+                    device["addresses"].append(addr_str)
+            if device["ip"] is None and info["ip"] is not None:
+                device["ip"] = info["ip"]
+                if "_ip_int" in info:
+                    device["_ip_int"] = info["_ip_int"]
+            if "properties" in info:
+                device.setdefault("properties", {}).update(info["properties"])
+        self.devices_by_key[key] = device
 
     def add_service(self, zc, type_, name):
-        try:
-            info = zc.get_service_info(type_, name)
-            if info is None:
-                logging.debug(f"No service info for {name}")
-                return
+        self.resolve_service(zc, type_, name)
 
-            device_info = {
-                "name": name,
-                "type": type_,
-                "ip": None,
-                "addresses": [],
-                "port": info.port,
-                "server": info.server,
-            }
-
-            # Get IP addresses (handle multiple IPs)
-            if info.addresses:
-                for address in info.addresses:
-                    try:
-                        addr_str = socket.inet_ntoa(address)
-                        device_info["addresses"].append(addr_str)
-                    except Exception as e:
-                        logging.error(f"Error converting address {address}: {e}")
-
-                # Set primary IP to first address for backward compatibility
-                if device_info["addresses"]:
-                    device_info["ip"] = device_info["addresses"][0]
-
-            # Get properties (handle both bytes and strings)
-            if info.properties:
-                device_info["properties"] = {}
-                for k, v in info.properties.items():
-                    try:
-                        key_str = k.decode("utf-8") if isinstance(k, bytes) else k
-                        value_str = (
-                            v.decode("utf-8", errors="ignore")
-                            if isinstance(v, bytes) and v
-                            else ""
-                        )
-                        device_info["properties"][key_str] = value_str
-                    except Exception as e:
-                        logging.error(f"Error decoding property {k}: {e}")
-
-            self.devices.append(device_info)
-            logging.info(f"Found mDNS device: {name}")
-        except Exception as ex:
+    def resolve_service(self, zc, type_, name):
+        # Called from the event loop, so resolve in a task instead of blocking it
+        self.cancel_lookup(name)
+        task = asyncio.ensure_future(self.async_add_service(zc, type_, name))
+        self.tasks[name] = task
+
+        def done(task):
+            if self.tasks.get(name) is task:
+                del self.tasks[name]
+
+        task.add_done_callback(done)
+
+    def cancel_lookup(self, name):
+        """Cancel a lookup still in flight for a service, its result is stale"""
+        task = self.tasks.pop(name, None)
+        if task is not None:
+            task.cancel()
+
+    async def async_wait_quiet(self, timeout):
+        """Wait until no services have been added for MDNS_QUIET_PERIOD, capped at timeout"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self.added.clear()
+            try:
+                await asyncio.wait_for(
+                    self.added.wait(), min(MDNS_QUIET_PERIOD, remaining)
+                )
+            except asyncio.TimeoutError:
+                # Only stop early once something has answered
+                if self.devices_by_key:
+                    return
+
+    async def async_add_service(self, zc, type_, name):
+        try:
+            info = AsyncServiceInfo(type_, name)
+            found = await info.async_request(zc, MDNS_LOOKUP_TIMEOUT)
+        except ZeroconfError as ex:
             logging.error(f"Error processing service {name}: {ex}")
+            return
+        if not found:
+            logging.debug(f"No service info for {name}")
+            return
+
+        device_info = {
+            "name": name,
+            "type": type_,
+            "ip": None,
+            "addresses": [],
+            "port": info.port,
+            "server": info.server,
+        }
+
+        # Get IP addresses (handle multiple IPs, IPv4 first then IPv6)
+        addresses = info.addresses_by_version(IPVersion.All)
+        for address in addresses:
+            if len(address) == 4:
+                device_info["addresses"].append(socket.inet_ntoa(address))
+            elif len(address) == 16:
+                device_info["addresses"].append(
+                    socket.inet_ntop(socket.AF_INET6, address)
+                )
+            else:
+                logging.error(f"Error converting address {address}: bad length")
+
+        # Set primary IP to first address for backward compatibility
+        if device_info["addresses"]:
+            device_info["ip"] = device_info["addresses"][0]
+            # Keep the integer form so sorting doesn't have to parse it again
+            if len(addresses[0]) == 4:
+                device_info["_ip_int"] = int.from_bytes(addresses[0], "big")
+
+        # Get properties (handle both bytes and strings)
+        if info.properties:
+            device_info["properties"] = {}
+            for k, v in info.properties.items():
+                try:
+                    key_str = k.decode("utf-8") if isinstance(k, bytes) else k
+                except UnicodeDecodeError as e:
+                    logging.error(f"Error decoding property {k}: {e}")
+                    continue
+                value_str = (
+                    v.decode("utf-8", errors="ignore")
+                    if isinstance(v, bytes) and v
+                    else ""
+                )
+                device_info["properties"][key_str] = value_str
+
+        self.add_device(name, device_info)
+        self.added.set()
+        logging.info(f"Found mDNS device: {name}")
 
     def remove_service(self, zc, type_, name):
-        pass
+        # Don't let a lookup started before the removal add the service back
+        self.cancel_lookup(name)
+        self.remove_device(name)
+        logging.info(f"Removed mDNS device: {name}")
 
     def update_service(self, zc, type_, name):
-        pass
+        # The listener outlives requests, so pick up new addresses, ports, etc.
+        self.resolve_service(zc, type_, name)
+
+
+def start_mdns_browser(timeout=5):
+    """
+    Start the long-lived mDNS browser, if it isn't running already
+
+    The browser keeps running in Zeroconf's own event loop thread, so the
+    listener stays up to date between requests and Zeroconf's cache is reused.
+
+    Args:
+        timeout: How long the first discovery waits for responses (seconds)
+
+    Returns:
+        Tuple of the AsyncZeroconf instance, the listener and a future that
+        completes once the first discovery has quieted down
+    """
+    global _mdns_browser
+
+    with _mdns_lock:
+        if _mdns_browser is None:
+            logging.info("Starting mDNS discovery")
+            # Created outside an event loop, so Zeroconf starts its own loop thread
+            aiozc = AsyncZeroconf()
+            loop = aiozc.zeroconf.loop
+            listener = MDNSListener()
+
+            async def start():
+                # One browser watches every service type, so each record update is
+                # matched against the whole set once instead of once per browser
+                AsyncServiceBrowser(
+                    aiozc.zeroconf, list(MDNS_SERVICE_TYPES), listener=listener
+                )
+                await listener.async_wait_quiet(timeout)
+
+            ready = asyncio.run_coroutine_threadsafe(start(), loop)
+            atexit.register(aiozc.zeroconf.close)
+            _mdns_browser = (aiozc, listener, ready)
+
+        return _mdns_browser
+
+
+def stop_mdns_browser(browser):
+    """
+    Close an mDNS browser whose first discovery failed, so the next call starts a new one
+
+    Args:
+        browser: Tuple returned by start_mdns_browser
+    """
+    global _mdns_browser
+
+    with _mdns_lock:
+        # Another request may already have replaced it
+        if _mdns_browser is browser:
+            _mdns_browser = None
+
+    aiozc = browser[0]
+    atexit.unregister(aiozc.zeroconf.close)
+    aiozc.zeroconf.close()
 
 
 def discover_mdns_devices(timeout=5):
@@ -157,120 +548,89 @@ def discover_mdns_devices(timeout=5):
     Discover mDNS devices on the local network
 
     Args:
-        timeout: How long to wait for responses (seconds)
+        timeout: How long the first discovery waits for responses (seconds)
 
     Returns:
         List of dictionaries containing device information
     """
-    zeroconf = Zeroconf()
-    listener = MDNSListener()
-
-    # Common service types to browse
-    # fmt: off
-    service_types = [
-        "_afpovertcp._tcp.local.",            # AppleTalk Filing Protocol (AFP)
-        "_airdrop._tcp.local.",               # Apple AirDrop
-        "_airplay._tcp.local.",               # Apple AirPlay (Apple TV)
-        "_airport._tcp.local.",               # Apple AirPort
-        "_androidtvremote._tcp.local.",       # Nvidia Shield / Android TV
-        "_axis-video._tcp.local.",            # Axis cameras
-        "_bose._tcp.local.",                  # Bose speakers
-        "_companion-link._tcp.local.",        # Apple TV remote
-        "_cups._sub._ipps._tcp.local.",       # Printers (CUPS)
-        "_daap._tcp.local.",                  # Apple iTunes music sharing
-        "_device-info._tcp.local.",           # Apple device info
-        "_epson-scanner._tcp.local.",         # Epson scanners
-        "_ftp._tcp.local.",                   # FTP
-        "_googlecast._tcp.local.",            # Google Cast (Chromecast)
-        "_googlezone._tcp.local.",            # Google Home
-        "_hap._tcp.local.",                   # Apple HomeKit Accessory Protocol
-        "_homekit._tcp.local.",               # Apple HomeKit
-        "_http._tcp.local.",                  # HTTP
-        "_https._tcp.local.",                 # HTTPS
-        "_hue._tcp.local.",                   # Philips Hue bridge
-        "_ipp._tcp.local.",                   # Printers (Internet Printing Protocol)
-        "_ipps._tcp.local.",                  # Printers (IPP over TLS)
-        "_matter._tcp.local.",                # Matter smart home protocol
-        "_mqtt._tcp.local.",                  # MQTT broker
-        "_nfs._tcp.local.",                   # Network File System
-        "_nut._tcp.local.",                   # Network UPS Tools
-        "_pdl-datastream._tcp.local.",        # Printers (Apple Page Description Language)
-        "_philipshue._tcp.local.",            # Philips Hue lights
-        "_printer._tcp.local.",               # Printers
-        "_raop._tcp.local.",                  # Apple AirPlay audio (AirTunes)
-        "_remote-login._tcp.local.",          # Remote login
-        "_rfb._tcp.local.",                   # VNC (Remote Frame Buffer)
-        "_roku._tcp.local.",                  # Roku streaming devices
-        "_rsp._tcp.local.",                   # Roku streaming player
-        "_scanner._tcp.local.",               # Scanners
-        "_sftp-ssh._tcp.local.",              # SFTP
-        "_shelly._tcp.local.",                # Shelly IoT devices
-        "_sleep-proxy._udp.local.",           # Apple Bonjour sleep proxy
-        "_smb._tcp.local.",                   # SMB/Samba file sharing
-        "_sonos._tcp.local.",                 # Sonos speakers
-        "_spotify-connect._tcp.local.",       # Spotify Connect
-        "_ssh._tcp.local.",                   # SSH
-        "_telnet._tcp.local.",                # Telnet
-        "_webdav._tcp.local.",                # WebDAV
-        "_webdavs._tcp.local.",               # WebDAV
-        "_workstation._tcp.local.",           # Workstation service
-    ]
-
-    browsers = []
     try:
-        logging.info("Starting mDNS discovery")
-        for service_type in service_types:
-            browser = ServiceBrowser(zeroconf, service_type, listener)
-            browsers.append(browser)
-
-        # Wait for discoveries
-        import time
-
-        time.sleep(timeout)
+        browser = start_mdns_browser(timeout)
+    except Exception as e:
+        logging.error(f"Error during mDNS discovery: {e}")
+        return []
 
+    _, listener, ready = browser
+    try:
+        # Only the first call(s) wait, after that the listener is kept up to date
+        ready.result(timeout + 1)
+    except FutureTimeoutError:
+        logging.error("Timed out waiting for mDNS discovery")
+        return []
     except Exception as e:
         logging.error(f"Error during mDNS discovery: {e}")
-    finally:
-        zeroconf.close()
+        stop_mdns_browser(browser)
+        return []
 
-    return listener.devices
+    return listener.snapshot()
 
 
 def ip_sort_key(device):
     """
-    Return an IPv4Address for sorting devices by IP address.
+    Return an integer for sorting devices by IP address.
     Devices without valid IPs are sorted to the end.
 
     Args:
-        device: Dictionary containing device information with optional 'ip' key
+        device: Dictionary containing device information with optional 'ip' key,
+            or a precomputed '_ip_int' key
 
     Returns:
-        IPv4Address object for sorting
+        Integer form of the IPv4 address for sorting
     """
+    ip_int = device.get("_ip_int")
+    if ip_int is not None:
+        return ip_int
+
     ip = device.get("ip", "")
-    if ip:
+    # Check the shape first so IPv6 and junk don't go through the exception path
+    if ip and ip.count(".") == 3:
         try:
-            return IPv4Address(ip)
-        except Exception as e:
-            logging.warning(f"Invalid IP address '{ip}': {e}")
-            return IPv4Address("255.255.255.255")  # Put invalid IPs at the end
-    return IPv4Address("255.255.255.255")  # Put devices without IP at the end
+            return int.from_bytes(socket.inet_aton(ip), "big")
+        except OSError:
+            pass
+    if ip:
+        logging.debug(f"Invalid IPv4 address '{ip}'")
+    return IP_SORT_END  # Put devices without a valid IP at the end
 
 
 @app.route("/")
 def index():
-    """Serve the main page with discovered devices"""
-    ssdp_devices = discover_ssdp_devices(timeout=5)
-    mdns_devices = discover_mdns_devices(timeout=5)
+    """Serve the main page, streaming each section as its discovery finishes"""
+    # Run both discoveries in parallel, they spend all their time waiting on the network
+    executor = ThreadPoolExecutor(max_workers=2)
+    ssdp_future = executor.submit(discover_ssdp_devices, timeout=5)
+    mdns_future = executor.submit(discover_mdns_devices, timeout=5)
+    # Don't block here, the page header is sent before either discovery finishes
+    executor.shutdown(wait=False)
+
+    def load_devices(future):
+        def load():
+            # The page header has already been sent, so an error here must not
+            # escape or the response ends up truncated
+            try:
+                devices = future.result()
+            except Exception as e:
+                logging.error(f"Error during discovery: {e}")
+                return []
+
+            # Sort devices by IP address
+            return sorted(devices, key=ip_sort_key)
 
-    # Sort devices by IP address
-    ssdp_devices.sort(key=ip_sort_key)
-    mdns_devices.sort(key=ip_sort_key)
+        return load
 
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    return render_template(
+    return stream_template(
         "index.html",
-        ssdp_devices=ssdp_devices,
-        mdns_devices=mdns_devices,
+        load_ssdp_devices=load_devices(ssdp_future),
+        load_mdns_devices=load_devices(mdns_future),
         timestamp=timestamp,
     )
@@ -1,6 +1,16 @@
+import asyncio
 from ipaddress import IPv4Address
 
-from src.app import discover_mdns_devices, discover_ssdp_devices, ip_sort_key
+import src.app
+from src.app import (
+    MDNSListener,
+    build_ssdp_request,
+    discover_mdns_devices,
+    discover_ssdp_devices,
+    ip_sort_key,
+    parse_ssdp_headers,
+    ttl_cache,
+)
 
 ################################################################################
 # tests for `ip_sort_key`
@@ -12,7 +22,23 @@ def test_ip_sort_key_valid_ip():
     device = {"ip": "192.168.1.10"}
     result = ip_sort_key(device)
     print(f"\nResult: {result}")
-    assert result == IPv4Address("192.168.1.10")
+    assert result == int(IPv4Address("192.168.1.10"))
+
+
+def test_ip_sort_key_precomputed_int():
+    """Test that a precomputed integer IP is used as-is"""
+    device = {"ip": "192.168.1.10", "_ip_int": int(IPv4Address("192.168.1.10"))}
+    result = ip_sort_key(device)
+    print(f"\nResult: {result}")
+    assert result == int(IPv4Address("192.168.1.10"))
+
+
+def test_ip_sort_key_ipv6():
+    """Test that IPv6 addresses sort to the end"""
+    device = {"ip": "fe80::1"}
+    result = ip_sort_key(device)
+    print(f"\nResult: {result}")
+    assert result == int(IPv4Address("255.255.255.255"))
 
 
 def test_ip_sort_key_missing_ip():
@@ -20,7 +46,7 @@ def test_ip_sort_key_missing_ip():
     device = {"name": "test-device"}
     result = ip_sort_key(device)
     print(f"\nResult: {result}")
-    assert result == IPv4Address("255.255.255.255")
+    assert result == int(IPv4Address("255.255.255.255"))
 
 
 def test_ip_sort_key_invalid_ip():
@@ -28,7 +54,15 @@ def test_ip_sort_key_invalid_ip():
     device = {"ip": "not-an-ip"}
     result = ip_sort_key(device)
     print(f"\nResult: {result}")
-    assert result == IPv4Address("255.255.255.255")
+    assert result == int(IPv4Address("255.255.255.255"))
+
+
+def test_ip_sort_key_short_ip():
+    """Test that a shorthand IPv4 address is treated as invalid"""
+    device = {"ip": "192.168.1"}
+    result = ip_sort_key(device)
+    print(f"\nResult: {result}")
+    assert result == int(IPv4Address("255.255.255.255"))
 
 
 def test_ip_sort_key_empty_string():
@@ -36,7 +70,7 @@ def test_ip_sort_key_empty_string():
     device = {"ip": ""}
     result = ip_sort_key(device)
     print(f"\nResult: {result}")
-    assert result == IPv4Address("255.255.255.255")
+    assert result == int(IPv4Address("255.255.255.255"))
 
 
 def test_sorting_devices_by_ip():
@@ -66,6 +100,126 @@ def test_sorting_devices_by_ip():
     assert "ip" not in sorted_devices[4]
 
 
+################################################################################
+# tests for `MDNSListener`
+################################################################################
+
+
+def mdns_device(name, server, port, ip):
+    """Build a device dictionary like the one MDNSListener creates"""
+    return {
+        "name": name,
+        "type": "_http._tcp.local.",
+        "ip": ip,
+        "addresses": [ip],
+        "port": port,
+        "server": server,
+    }
+
+
+def test_mdns_listener_snapshot_is_copy():
+    """Test that a snapshot is not changed by later discoveries"""
+    listener = MDNSListener()
+    listener.add_device(
+        "device1._http._tcp.local.",
+        mdns_device("device1._http._tcp.local.", "host1.local.", 80, "192.168.1.10"),
+    )
+    snapshot = listener.snapshot()
+    listener.add_device(
+        "device2._http._tcp.local.",
+        mdns_device("device2._http._tcp.local.", "host2.local.", 80, "192.168.1.2"),
+    )
+    print(f"\nSnapshot: {snapshot}")
+    assert len(snapshot) == 1
+
+
+def test_mdns_listener_merges_duplicates():
+    """Test that services with the same server and port become one device"""
+    listener = MDNSListener()
+    listener.add_device(
+        "device1._http._tcp.local.",
+        mdns_device("device1._http._tcp.local.", "host1.local.", 80, "192.168.1.10"),
+    )
+    listener.add_device(
+        "device1._airplay._tcp.local.",
+        mdns_device("device1._airplay._tcp.local.", "host1.local.", 80, "192.168.1.11"),
+    )
+    devices = listener.snapshot()
+    print(f"\nDevices: {devices}")
+    assert len(devices) == 1
+    assert devices[0]["ip"] == "192.168.1.10"
+    assert devices[0]["addresses"] == ["192.168.1.10", "192.168.1.11"]
+
+
+def test_mdns_listener_remove_service():
+    """Test that a device is dropped once all of its services are removed"""
+    listener = MDNSListener()
+    listener.add_device(
+        "device1._http._tcp.local.",
+        mdns_device("device1._http._tcp.local.", "host1.local.", 80, "192.168.1.10"),
+    )
+    listener.add_device(
+        "device1._airplay._tcp.local.",
+        mdns_device("device1._airplay._tcp.local.", "host1.local.", 80, "192.168.1.11"),
+    )
+    listener.add_device(
+        "device2._http._tcp.local.",
+        mdns_device("device2._http._tcp.local.", "host2.local.", 80, "192.168.1.2"),
+    )
+
+    listener.remove_service(None, "_http._tcp.local.", "device1._http._tcp.local.")
+    devices = listener.snapshot()
+    print(f"\nDevices: {devices}")
+    assert len(devices) == 2
+    # The remaining device is rebuilt from the service that is still there
+    device1 = next(d for d in devices if d["server"] == "host1.local.")
+    assert device1["name"] == "device1._airplay._tcp.local."
+    assert device1["ip"] == "192.168.1.11"
+    assert device1["addresses"] == ["192.168.1.11"]
+
+    listener.remove_service(
+        None, "_airplay._tcp.local.", "device1._airplay._tcp.local."
+    )
+    servers = [d["server"] for d in listener.snapshot()]
+    print(f"\nServers: {servers}")
+    assert servers == ["host2.local."]
+
+
+def test_mdns_listener_replaces_updated_service():
+    """Test that re-resolving a service replaces its old details"""
+    listener = MDNSListener()
+    listener.add_device(
+        "device1._http._tcp.local.",
+        mdns_device("device1._http._tcp.local.", "host1.local.", 80, "10.1.2.3"),
+    )
+    listener.add_device(
+        "device1._http._tcp.local.",
+        mdns_device("device1._http._tcp.local.", "host1.local.", 80, "10.9.9.9"),
+    )
+    devices = listener.snapshot()
+    print(f"\nDevices: {devices}")
+    assert len(devices) == 1
+    assert devices[0]["ip"] == "10.9.9.9"
+    assert devices[0]["addresses"] == ["10.9.9.9"]
+
+
+def test_mdns_listener_remove_cancels_lookup():
+    """Test that removing a service cancels its pending lookup"""
+
+    async def add_then_remove():
+        listener = MDNSListener()
+        listener.add_service(None, "_http._tcp.local.", "device1._http._tcp.local.")
+        task = listener.tasks["device1._http._tcp.local."]
+        listener.remove_service(None, "_http._tcp.local.", "device1._http._tcp.local.")
+        await asyncio.sleep(0)
+        return listener, task
+
+    listener, task = asyncio.run(add_then_remove())
+    assert task.cancelled()
+    assert listener.tasks == {}
+    assert listener.snapshot() == []
+
+
 ################################################################################
 # tests for `discover_mdns_devices`
 ################################################################################
@@ -84,6 +238,84 @@ def test_discover_mdns_devices_returns_list():
         assert "type" in device
 
 
+################################################################################
+# tests for `build_ssdp_request`
+################################################################################
+
+
+def test_build_ssdp_request():
+    """Test that the M-SEARCH message carries the search target"""
+    request = build_ssdp_request("upnp:rootdevice")
+    print(f"\nRequest: {request}")
+    assert request.startswith(b"M-SEARCH * HTTP/1.1\r\n")
+    assert b"\r\nST: upnp:rootdevice\r\n" in request
+    assert request.endswith(b"\r\n\r\n")
+
+
+################################################################################
+# tests for `parse_ssdp_headers`
+################################################################################
+
+
+def test_parse_ssdp_headers():
+    """Test parsing a typical SSDP response"""
+    data = (
+        b"HTTP/1.1 200 OK\r\n"
+        b"CACHE-CONTROL: max-age=1800\r\n"
+        b"LOCATION: http://192.168.1.10:49152/description.xml\r\n"
+        b"SERVER: Linux/3.14 UPnP/1.0 Device/1.0\r\n"
+        b"ST: upnp:rootdevice\r\n"
+        b"USN: uuid:1234::upnp:rootdevice\r\n"
+        b"EXT:\r\n"
+        b"\r\n"
+    )
+    headers = parse_ssdp_headers(data)
+    print(f"\nHeaders: {headers}")
+    assert headers["location"] == "http://192.168.1.10:49152/description.xml"
+    assert headers["server"] == "Linux/3.14 UPnP/1.0 Device/1.0"
+    assert headers["st"] == "upnp:rootdevice"
+    assert headers["usn"] == "uuid:1234::upnp:rootdevice"
+    assert "http/1.1 200 ok" not in headers
+    assert "ext" not in headers
+
+
+def test_parse_ssdp_headers_odd_formatting():
+    """Test parsing mixed case keys, odd whitespace and bare LF line endings"""
+    data = (
+        b"HTTP/1.1 200 OK\n"
+        b"Location :\thttp://192.168.1.10/desc.xml  \n"
+        b"st:upnp:rootdevice\n"
+        b"uSn:   uuid:1234\n"
+        b"\n"
+    )
+    headers = parse_ssdp_headers(data)
+    print(f"\nHeaders: {headers}")
+    assert headers == {
+        "location": "http://192.168.1.10/desc.xml",
+        "st": "upnp:rootdevice",
+        "usn": "uuid:1234",
+    }
+
+
+def test_parse_ssdp_headers_empty():
+    """Test parsing a response with no headers"""
+    assert parse_ssdp_headers(b"") == {}
+
+
+def test_discover_mdns_devices_resets_failed_start(monkeypatch):
+    """Test that a failed first discovery is thrown away instead of reused"""
+
+    async def fail(self, timeout):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(src.app, "_mdns_browser", None)
+    monkeypatch.setattr(MDNSListener, "async_wait_quiet", fail)
+    devices = discover_mdns_devices(timeout=1)
+    print(f"\nFound {len(devices)} mDNS devices")
+    assert devices == []
+    assert src.app._mdns_browser is None
+
+
 ################################################################################
 # tests for `discover_ssdp_devices`
 ################################################################################
@@ -100,3 +332,82 @@ def test_discover_ssdp_devices_returns_list():
         print(f"Device: {device}")
         assert "ip" in device
         assert isinstance(device["ip"], str)
+
+
+def test_discover_ssdp_devices_socket_error(monkeypatch):
+    """Test that a socket setup error returns no devices instead of raising"""
+    # An out of range TTL makes setsockopt fail with EINVAL
+    monkeypatch.setattr(src.app, "SSDP_MULTICAST_TTL", 256)
+    devices = discover_ssdp_devices.__wrapped__(timeout=1)
+    print(f"\nFound {len(devices)} devices")
+    assert devices == []
+
+
+################################################################################
+# tests for `ttl_cache`
+################################################################################
+
+
+def test_ttl_cache_reuses_result():
+    """Test that a cached function is only called once within the TTL"""
+    calls = []
+
+    @ttl_cache(ttl=60)
+    def discover(timeout=1):
+        calls.append(timeout)
+        return [{"ip": "192.168.1.10"}]
+
+    first = discover(timeout=1)
+    second = discover(timeout=1)
+    print(f"\nCalls: {calls}")
+    assert first == second
+    assert len(calls) == 1
+
+
+def test_ttl_cache_returns_copy():
+    """Test that sorting a cached result does not change the cache"""
+
+    @ttl_cache(ttl=60)
+    def discover():
+        return [{"ip": "192.168.1.10"}, {"ip": "10.0.0.1"}]
+
+    devices = discover()
+    devices.sort(key=ip_sort_key)
+    assert discover()[0]["ip"] == "192.168.1.10"
+
+
+def test_ttl_cache_expires():
+    """Test that an expired entry is refreshed"""
+    calls = []
+
+    @ttl_cache(ttl=0)
+    def discover():
+        calls.append(1)
+        return []
+
+    discover()
+    discover()
+    assert len(calls) == 2
+
+
+################################################################################
+# tests for `index`
+################################################################################
+
+
+def test_index_survives_discovery_error(monkeypatch):
+    """Test that a failing discovery still renders the whole page"""
+
+    def fail(**kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(src.app, "discover_ssdp_devices", fail)
+    monkeypatch.setattr(
+        src.app, "discover_mdns_devices", lambda **kwargs: [{"name": "device1"}]
+    )
+    response = src.app.app.test_client().get("/")
+    body = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert "No SSDP devices found" in body
+    assert "device1" in body
+    assert body.rstrip().endswith("</html>")